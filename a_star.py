@@ -1,10 +1,232 @@
-from typing import List, Optional, Tuple
-from node import Node, Edge, NodeType
+from typing import List, Tuple
+from node import NodeType
+from array import array
+import heapq
+import itertools
 import math
 
+# Maps every byte value to the value of its node type, e.g. values above the known types become obstacles.
+_NODE_TYPE_TABLE = bytes(NodeType.from_value(value).value for value in range(256))
+
+# Define how the path looks like by setting weights for orthogonal and diagonal edges.
+# https://stackoverflow.com/questions/36493642/a-pathfinding-calculating-g-cost
+_WEIGHT_ORTHOGONAL = 10.0
+_WEIGHT_DIAGONAL = 14.0
+
+# The (dx, dy) directions of all neighbours around a node.
+_DIRECTIONS: Tuple[Tuple[int, int], ...] = (
+    (-1, 1),  # TL
+    (0, 1),  # TC
+    (1, 1),  # TR
+    (1, 0),  # CR
+    (1, -1),  # BR
+    (0, -1),  # BC
+    (-1, -1),  # BL
+    (-1, 0),  # CL
+)
+
+_OBSTACLE = NodeType.OBSTACLE.value
+
+
+def _octile_distance(dx: int, dy: int) -> float:
+    """Octile distance between two points without obstacles.
+
+    This is the exact cost of the shortest path using the weights above, so it never overestimates
+    and needs no square root.
+
+    :param dx: The distance on the x axis.
+    :param dy: The distance on the y axis.
+    :return: The distance.
+    """
+    dx, dy = (abs(dx), abs(dy))
+    if dx < dy:
+        dx, dy = (dy, dx)
+    return _WEIGHT_ORTHOGONAL * (dx - dy) + _WEIGHT_DIAGONAL * dy
+
+
+def _jump_straight(type_grid: bytearray, index: int, step: int, side: int, index_end: int) -> int:
+    """Walks from a node in an orthogonal direction until it reaches a jump point.
+
+    A jump point is the end or a node with a forced neighbour, i.e. a neighbour behind an obstacle next to the walk,
+    which can only be reached optimally through this node. All nodes skipped in between are reached at least as cheap
+    by other paths, so they never have to be opened.
+
+    :param type_grid: The padded type grid.
+    :param index: The index of the first node to check.
+    :param step: The index offset of one step in the walking direction.
+    :param side: The index offset of one step perpendicular to the walking direction.
+    :param index_end: The index of the end.
+    :return: The index of the jump point or -1 if the walk hits an obstacle.
+    """
+    while type_grid[index] != _OBSTACLE:
+        if index == index_end:
+            return index
+        if (type_grid[index + side] == _OBSTACLE and type_grid[index + step + side] != _OBSTACLE) \
+                or (type_grid[index - side] == _OBSTACLE and type_grid[index + step - side] != _OBSTACLE):
+            return index
+        index += step
+    return -1
+
+
+def _jump_diagonal(type_grid: bytearray, index: int, step_x: int, step_y: int, index_end: int) -> int:
+    """Walks from a node in a diagonal direction until it reaches a jump point.
+
+    Besides the end and nodes with a forced neighbour, the walk stops at nodes from which one of the two orthogonal
+    walks reaches a jump point. Diagonal moves are allowed next to obstacles, like for the plain neighbours.
+
+    :param type_grid: The padded type grid.
+    :param index: The index of the first node to check.
+    :param step_x: The index offset of the x component of one step.
+    :param step_y: The index offset of the y component of one step.
+    :param index_end: The index of the end.
+    :return: The index of the jump point or -1 if the walk hits an obstacle.
+    """
+    while type_grid[index] != _OBSTACLE:
+        if index == index_end:
+            return index
+        if (type_grid[index - step_x] == _OBSTACLE and type_grid[index - step_x + step_y] != _OBSTACLE) \
+                or (type_grid[index - step_y] == _OBSTACLE and type_grid[index + step_x - step_y] != _OBSTACLE):
+            return index
+        if _jump_straight(type_grid, index + step_x, step_x, step_y, index_end) >= 0 \
+                or _jump_straight(type_grid, index + step_y, step_y, step_x, index_end) >= 0:
+            return index
+        index += step_x + step_y
+    return -1
+
+
+def _get_directions(type_grid: bytearray, stride: int, index: int, parent: int) -> List[Tuple[int, int]]:
+    """Gets the directions worth searching from a node, based on the direction it was reached from.
+
+    Only the natural neighbours (straight ahead, plus both orthogonal components after a diagonal move) and the forced
+    neighbours around adjacent obstacles are kept. All other neighbours are reached at least as cheap through the parent.
+
+    :param type_grid: The padded type grid.
+    :param stride: The index offset of one step on the x axis.
+    :param index: The index of the node.
+    :param parent: The index of the parent of the node.
+    :return: The list of (dx, dy) directions.
+    """
+    (x, y) = divmod(index, stride)
+    (px, py) = divmod(parent, stride)
+    dx = (x > px) - (x < px)
+    dy = (y > py) - (y < py)
+
+    if dx != 0 and dy != 0:
+        result = [(0, dy), (dx, 0), (dx, dy)]
+        if type_grid[index - dx * stride] == _OBSTACLE:
+            result.append((-dx, dy))
+        if type_grid[index - dy] == _OBSTACLE:
+            result.append((dx, -dy))
+    elif dx != 0:
+        result = [(dx, 0)]
+        if type_grid[index + 1] == _OBSTACLE:
+            result.append((dx, 1))
+        if type_grid[index - 1] == _OBSTACLE:
+            result.append((dx, -1))
+    else:
+        result = [(0, dy)]
+        if type_grid[index + stride] == _OBSTACLE:
+            result.append((1, dy))
+        if type_grid[index - stride] == _OBSTACLE:
+            result.append((-1, dy))
+    return result
+
+
+def _search(type_grid: bytearray, stride: int, index_start: int, index_end: int,
+            g: array, parent: array, h_cache: array, touched: List[int]) -> bool:
+    """Runs the A* search with jump point search on a flat layout.
+
+    Instead of opening all eight neighbours of a node, only the jump points reachable from the pruned
+    directions are opened, see: https://users.cecs.anu.edu.au/~dharabor/data/papers/harabor-grastien-aaai11.pdf
+    All arguments are plain arrays and ints indexed by x * stride + y, so the expansion loop runs on local variables.
+
+    :param type_grid: The node type values of the layout, padded with a border of obstacles.
+    :param stride: The index offset of one step on the x axis.
+    :param index_start: The index of the start.
+    :param index_end: The index of the end.
+    :param g: The G costs, filled with infinity. Updated in place.
+    :param parent: The parent indices, filled with -1. Updated in place with the previous jump point of each jump point.
+    :param h_cache: The memoized H costs, negative values mark costs that are not calculated yet. Updated in place.
+    :param touched: The indices of all nodes whose G cost and parent get written are appended, so they can be reset later.
+    :return: True if a path was found, else False.
+    """
+    (end_x, end_y) = divmod(index_end, stride)
+    heappush, heappop = (heapq.heappush, heapq.heappop)
+
+    # Nodes that have to be considered for the final path, e.g. neighbors of start and have to be checked further.
+    # Kept as a binary heap of (f, tiebreaker, index) entries. A node whose path gets improved is pushed again,
+    # outdated entries are skipped when popped (lazy deletion).
+    counter = itertools.count()
+    open_heap: List[Tuple[float, int, int]] = [(0.0, next(counter), index_start)]
+
+    # Indices of nodes that have been in the open heap previously but are now done with processing.
+    # These dont have to be checked again.
+    closed = set()
+
+    g[index_start] = 0.0
+    touched.append(index_start)
+
+    while open_heap:
+        # find lowest F score in the open heap, skipping entries of nodes that are already closed
+        # Note: Since H is fixed per node, a better path for a node always has a lower F and is popped first.
+        current = heappop(open_heap)[2]
+        if current in closed:
+            continue
+
+        # switch lowest F to the closed list
+        closed.add(current)
+
+        if current == index_end:
+            # we have found the end node
+            return True
+
+        (x, y) = divmod(current, stride)
+        g_current = g[current]
+
+        if current == index_start:
+            directions = _DIRECTIONS
+        else:
+            directions = _get_directions(type_grid, stride, current, parent[current])
+
+        for (dx, dy) in directions:
+            step_x = dx * stride
+            if dx != 0 and dy != 0:
+                neighbour = _jump_diagonal(type_grid, current + step_x + dy, step_x, dy, index_end)
+            elif dx != 0:
+                neighbour = _jump_straight(type_grid, current + step_x, step_x, 1, index_end)
+            else:
+                neighbour = _jump_straight(type_grid, current + dy, dy, stride, index_end)
+
+            # We dont want dead ends and closed jump points.
+            if neighbour < 0 or neighbour in closed:
+                continue
+
+            # Is this path (with current as parent) better than the one already in the heap?
+            (nx, ny) = divmod(neighbour, stride)
+            g_neighbour = g_current + _octile_distance(nx - x, ny - y)
+            if g_neighbour >= g[neighbour]:
+                continue
+
+            # Yes, the path for the current parent is better (or the first one found)!
+            if parent[neighbour] < 0:
+                touched.append(neighbour)
+            g[neighbour] = g_neighbour
+            parent[neighbour] = current
+
+            # The H cost is calculated once per node and memoized, since a node can be relaxed many times.
+            h = h_cache[neighbour]
+            if h < 0:
+                h = _octile_distance(end_x - nx, end_y - ny)
+                h_cache[neighbour] = h
+
+            heappush(open_heap, (g_neighbour + h, next(counter), neighbour))
+
+    # nothing todo and no path was found
+    return False
+
 
 class AStar:
-    """Searches a path from a start point to an end point in a 2D array without crossing obstacles using the A* algorithm and the euclidean distance.
+    """Searches a path from a start point to an end point in a 2D array without crossing obstacles using the A* algorithm with jump point search and the octile distance.
 
     2D array elements:
     0 = blank fields
@@ -32,186 +254,121 @@ class AStar:
     ```
     """
 
-    # The initial maze layout converted into the internal node structure.
-    __layout: List[List[Node]] = None
-
-    # The start point (number code = 3).
-    __node_start: Node = None
-    # The end point (number code = 2).
-    __node_end: Node = None
-
-    # Nodes that have to be considered for the final path, e.g. neighbors of start and have to be checked further.
-    __open_list: List[Node] = []
-
-    # Nodes that have been in openList previously but are now done with processing. These dont have to be checked again.
-    __closed_list: List[Node] = []
+    # The initial maze layout converted into node type values and padded with a border of obstacles,
+    # so neighbours never have to be bounds checked. The coordinate (x, y) has the index (x + 1) * stride + (y + 1).
+    __type_grid: bytearray = None
+    # The dimensions of the layout.
+    __len_x: int = 0
+    __len_y: int = 0
+    # The index offset of one step on the x axis in the type grid.
+    __stride: int = 0
+
+    # The index of the start point (number code = 1) in the type grid.
+    __index_start: int = -1
+    # The index of the end point (number code = 2) in the type grid.
+    __index_end: int = -1
+
+    # The per node search state, indexed like the type grid:
+    # The best G cost found so far.
+    __g: array = None
+    # The index of the parent jump point on the best path found so far, -1 if there is none.
+    __parent: array = None
+
+    # The indices of all nodes whose search state was written by the last search.
+    __touched: List[int] = None
+
+    # Memoized H costs, indexed like the type grid. Negative values mark costs that are not calculated yet.
+    # Since the end never changes, these stay valid across searches.
+    __h_cache: array = None
 
     def __init__(self, arr2d: List[List[int]]):
         x_len, y_len = (len(arr2d), len(arr2d[0]))
-        self.__layout = [[Node.empty() for _ in range(y_len)]
-                         for _ in range(x_len)]
+        self.__len_x, self.__len_y = (x_len, y_len)
+        self.__stride = stride = y_len + 2
+        self.__type_grid = bytearray([NodeType.OBSTACLE.value]) * ((x_len + 2) * stride)
 
         for x in range(x_len):
-            for y in range(y_len):
-                node = Node(x, y, NodeType(NodeType.from_value(arr2d[x][y])))
-                self.__layout[x][y] = node
-                if node.is_start():
-                    self.__node_start = node
-                if node.is_end():
-                    self.__node_end = node
-
-        if self.__node_start is None:
+            try:
+                # convert a whole row at once and map the values to node types
+                row = bytes(map(int, arr2d[x])).translate(_NODE_TYPE_TABLE)
+            except ValueError:
+                # values outside of a byte, fall back to the per value conversion
+                row = bytes(NodeType.from_value(value).value for value in arr2d[x])
+            if len(row) != y_len:
+                raise InvalidLayoutInitializationException(
+                    'All rows need the same length.')
+            offset = (x + 1) * stride + 1
+            self.__type_grid[offset:offset + y_len] = row
+
+        # Note: The last occurrence wins if there are several starts or ends.
+        self.__index_start = self.__type_grid.rfind(NodeType.START.value)
+        if self.__index_start < 0:
             raise InvalidLayoutInitializationException('No start found.')
-        if self.__node_end is None:
+        self.__index_end = self.__type_grid.rfind(NodeType.END.value)
+        if self.__index_end < 0:
             raise InvalidLayoutInitializationException('No end found.')
 
+        size = len(self.__type_grid)
+        self.__g = array('d', [math.inf]) * size
+        self.__parent = array('l', [-1]) * size
+        self.__touched = list()
+        self.__h_cache = array('d', [-1.0]) * size
+
     def get_result(self) -> List[Tuple[int, int]]:
         """Gets the resulting path from start to end.
 
         :return: A list of coordinates which represents the path between start and end.
         :raises PathNotFoundException: If no path could be found.
         """
-        if not self.__node_end.has_edge_to_parent():
+        index_start, index_end = (self.__index_start, self.__index_end)
+        if self.__parent[index_end] < 0:
             raise PathNotFoundException('Call search first.')
 
         result: List[Tuple[int, int]] = list()
-        parent = self.__node_end.edge_to_parent.target
+        current = index_end
 
         # working backwards from the target square until you reach the starting square
-        while parent.has_edge_to_parent() and not parent.is_start():
-            result.append((parent.x, parent.y))
-            parent = parent.edge_to_parent.target
+        while current != index_start:
+            parent = self.__parent[current]
+            (x, y) = self.__coordinate_of(current)
+            (px, py) = self.__coordinate_of(parent)
+
+            # jump points are connected by straight or diagonal lines, add every square in between
+            dx = (px > x) - (px < x)
+            dy = (py > y) - (py < y)
+            while (x, y) != (px, py):
+                x, y = (x + dx, y + dy)
+                result.append((x, y))
+
+            current = parent
+
+        # the start itself is not part of the result
+        result.pop()
 
         # order start to end
         result.reverse()
         return result
 
     def get_len_x(self) -> int:
-        return len(self.__layout)
+        return self.__len_x
 
     def get_len_y(self) -> int:
-        return len(self.__layout[0])
+        return self.__len_y
 
     def search(self) -> bool:
-        self.__node_end.set_edge_to_parent(None)
-        self.__open_list.clear()
-        self.__closed_list.clear()
-        self.__open_list.append(self.__node_start)
-        return self.__do_search()
-
-    def __do_search(self) -> bool:
-        if len(self.__open_list) <= 0:
-            # nothing todo and no path was found
-            return False
-
-        # find lowest F score in openList
-        current: Node = min(
-            self.__open_list, key=lambda x: self.__get_f_or_zero_if_start(x))
-
-        # switch lowest F to the closed list
-        self.__open_list.remove(current)
-        self.__closed_list.append(current)
-
-        if current.is_end():
-            # we have found the end node
-            # update the member end
-            self.__node_end = current
-            return True
-
-        for (neighbour, is_diagonal) in self.__get_neighbours(current):
-            # We dont want obstacles and closed neighbours.
-            if neighbour.is_obstacle() or neighbour in self.__closed_list:
-                continue
-
-            neighbour_with_edge = neighbour.set_edge_to_parent(Edge(current, self.__calc_g(
-                current, is_diagonal), self.__calc_h(neighbour), is_diagonal))
-
-            if neighbour_with_edge not in self.__open_list:
-                self.__open_list.append(neighbour_with_edge)
-            else:
-                # We already have this neighbour in list.
-                index_of_other = self.__open_list.index(neighbour_with_edge)
-                # Is this path (with current as parent) better than the on already in the list?
-                if neighbour_with_edge.edge_to_parent.g < self.__open_list[index_of_other].edge_to_parent.g:
-                    # Yes, the path for the current parent is better!
-                    # Change it.
-                    self.__open_list[index_of_other] = neighbour_with_edge
-
-        return self.__do_search()
-
-    def __get_f_or_zero_if_start(self, node: Node) -> float:
-        if node.node_type == NodeType.START:
-            return 0.0
-        return node.edge_to_parent.get_f()
-
-    def __calc_g(self, parent: Node, is_diagonal: bool):
-        """Calculates the G cost for an edge based on the parent edge G cost.
-
-        :param parent: The parent of the edge we want to calc the G cost for.
-        :param is_diagonal: Whether the edge we want to calcalate the G cost for has a diagonal or orthogonal neighbourship relation to its parent.
-        :return: The G cost.
-        """
-        # Note: Since the start has no parent we are going to return 0.
-        if not parent.has_edge_to_parent() and parent.node_type == NodeType.START:
-            return 0
-        elif not parent.has_edge_to_parent():
-            raise Exception('No edge found.')
-
-        # Define how the path looks like by setting weights for orthogonal and diagonal edges.
-        # https://stackoverflow.com/questions/36493642/a-pathfinding-calculating-g-cost
-        value: float = 10.0
-        if is_diagonal:
-            value = 14.0
-
-        return parent.edge_to_parent.g + value
-
-    def __calc_h(self, node: Node) -> float:
-        """Euclidean distance (h) to the end point.
-
-        :param node: Start point.
-        :return: The Distance.
-        """
-        dx = self.__node_end.x - node.x
-        dy = self.__node_end.y - node.y
-        return math.sqrt((dx * dx) + (dy * dy))
-
-    def __get_neighbours(self, node: Node) -> List[Tuple[Node, bool]]:
-        """Gets all neighbours around a specific node.
-
-        :param node: The node to get the naighbours for.
-        :return: The list of neighbours.
-        """
-
-        result: List[Tuple[Node, bool]] = list()
-        aligned_coordinates: List[Tuple[int, int, bool]] = list([
-            (node.x - 1, node.y + 1, True),  # TL
-            (node.x, node.y + 1, False),  # TC
-            (node.x + 1, node.y + 1, True),  # TR
-            (node.x + 1, node.y, False),  # CR
-            (node.x + 1, node.y - 1, True),  # BR
-            (node.x, node.y - 1, False),  # BC
-            (node.x - 1, node.y - 1, True),  # BL
-            (node.x - 1, node.y, False),  # CL
-
-        ])
-
-        for element in aligned_coordinates:
-            (x, y, a) = element
-            neighbour = self.__get_node_or_none(x, y)
-            if neighbour != None:
-                result.append((neighbour, a))
-
-        return result
-
-    def __get_node_or_none(self, x: int, y: int) -> Optional[Node]:
-        if self.__is_in_bounds(x, y):
-            return self.__layout[x][y]
-        return None
-
-    def __is_in_bounds(self, x: int, y: int) -> bool:
-        if x < 0 or x > self.get_len_x() - 1 or y < 0 or y > self.get_len_y() - 1:
-            return False
-        return True
+        # Only reset the nodes the previous search has touched instead of the whole layout.
+        g, parent = (self.__g, self.__parent)
+        for index in self.__touched:
+            g[index] = math.inf
+            parent[index] = -1
+        self.__touched.clear()
+
+        return _search(self.__type_grid, self.__stride, self.__index_start, self.__index_end,
+                       g, parent, self.__h_cache, self.__touched)
+
+    def __coordinate_of(self, index: int) -> Tuple[int, int]:
+        (x, y) = divmod(index, self.__stride)
+        return (x - 1, y - 1)
 
 
 class InvalidLayoutInitializationException(Exception):
@@ -1,6 +1,6 @@
 from typing import Optional
 from enum import Enum
-from dataclasses import dataclass, replace
+from dataclasses import dataclass
 
 
 class NodeType(Enum):
@@ -11,13 +11,16 @@ class NodeType(Enum):
 
     @staticmethod
     def from_value(value: int) -> 'NodeType':
-        maxValue = max([e.value for e in NodeType])
-        if value > maxValue:
-            return NodeType(maxValue)
+        if value > _MAX_NODE_TYPE_VALUE:
+            return NodeType(_MAX_NODE_TYPE_VALUE)
         return NodeType(value)
 
 
-@dataclass(frozen=True, eq=False)
+# The highest value of all node types, values above are mapped to it.
+_MAX_NODE_TYPE_VALUE = max([e.value for e in NodeType])
+
+
+@dataclass(eq=False)
 class Node:
     x: int
     y: int
@@ -69,15 +72,13 @@ class Node:
         return True
 
     def set_edge_to_parent(self, edge:  Optional['Edge']) -> 'Node':
-        return replace(self, edge_to_parent=edge)
+        """Sets the edge to the parent in place.
 
-    def __eq__(self, other):
-        if not isinstance(other, Node):
-            return NotImplemented
-        return self.x == other.x and self.y == other.y
-
-    def __hash__(self):
-        return hash((self.x, self.y))
+        :param edge: The new edge to the parent or None to unset it.
+        :return: This node.
+        """
+        self.edge_to_parent = edge
+        return self
 
 
 @dataclass(frozen=True)